@@ -1,5 +1,4 @@
 import os
-import json
 import uuid
 import logging
 from datetime import datetime
@@ -13,6 +12,7 @@ from models import init_db, db_session
 from memory_store import MemoryStore
 from kb_manager import KBManager
 from gemini_client import call_gemini, ensure_persona
+from response_parser import CHAT_SCHEMA, parse_model_json
 from summarizer import Summarizer
 from visualizer import Visualizer
 from source_verifier import SourceVerifier
@@ -165,19 +165,10 @@ def chat():
 	prompt = build_prompt(question, mode, persona, context_chunks, recent_memory)
 	# lower output tokens and temp in fast mode
 	generation_overrides = {"max_output_tokens": 500, "temperature": 0.1} if FAST_MODE else {}
-	model_resp = call_gemini(prompt, **generation_overrides) if generation_overrides else call_gemini(prompt)
-	# parse
-	def _safe_parse(text: str):
-		try:
-			clean = text.strip()
-			if clean.startswith("```"):
-				clean = clean.strip("`\n ")
-				if "\n" in clean:
-					clean = clean.split("\n", 1)[1]
-			return json.loads(clean)
-		except Exception:
-			return {"answer": text, "sources": [], "action": "", "notes": ""}
-	parsed = _safe_parse(model_resp.get("text", "")) if isinstance(model_resp, dict) else {"answer": str(model_resp)}
+	model_resp = call_gemini(prompt, response_schema=CHAT_SCHEMA, **generation_overrides)
+	# parse (recovers replies truncated by max_output_tokens)
+	chat_defaults = {"answer": "", "sources": [], "action": "", "notes": ""}
+	parsed = parse_model_json(model_resp.get("text", ""), fallback_key="answer", defaults=chat_defaults, partial_keys=("answer",)) if isinstance(model_resp, dict) else {"answer": str(model_resp)}
 	answer = parsed.get("answer", "")
 	sources = parsed.get("sources", [])
 	action = parsed.get("action", "")
@@ -1,10 +1,12 @@
 import os
 import json
 import logging
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 
 import requests
 
+from single_flight import SingleFlight
+
 logger = logging.getLogger(__name__)
 
 MODEL_NAME = os.getenv("GEMINI_MODEL", "gemini-2.5-flash")
@@ -29,6 +31,7 @@ TEMPERATURE = float(os.getenv("TEMPERATURE", "0.2"))
 
 _SESSION = requests.Session()
 _SESSION.headers.update({"User-Agent": "AskMePro/1.0", "Connection": "keep-alive"})
+_FLIGHT = SingleFlight()
 
 
 def _mock_response(prompt: str) -> Dict[str, Any]:
@@ -53,7 +56,14 @@ def ensure_persona(question: str) -> str:
 	return "teacher"
 
 
-def call_gemini(prompt: str, model: str = MODEL_NAME, temperature: float = TEMPERATURE, max_output_tokens: int = MAX_OUTPUT_TOKENS) -> Dict[str, Any]:
+def call_gemini(prompt: str, model: str = MODEL_NAME, temperature: float = TEMPERATURE, max_output_tokens: int = MAX_OUTPUT_TOKENS, response_schema: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+	# Identical concurrent requests share a single round-trip
+	schema_key = json.dumps(response_schema, sort_keys=True) if response_schema else None
+	key = (prompt, model, temperature, max_output_tokens, schema_key)
+	return dict(_FLIGHT.do(key, _call_gemini, prompt, model, temperature, max_output_tokens, response_schema))
+
+
+def _call_gemini(prompt: str, model: str, temperature: float, max_output_tokens: int, response_schema: Optional[Dict[str, Any]]) -> Dict[str, Any]:
 	if GEMINI_MOCK:
 		return _mock_response(prompt)
 	if not API_KEY:
@@ -61,9 +71,14 @@ def call_gemini(prompt: str, model: str = MODEL_NAME, temperature: float = TEMPE
 	# Prefer REST for lower overhead
 	try:
 		endpoint = f"https://generativelanguage.googleapis.com/v1beta/models/{model}:generateContent?key={API_KEY}"
+		generation_config = {"temperature": temperature, "maxOutputTokens": max_output_tokens, "candidateCount": 1}
+		if response_schema:
+			# Structured output: the model replies with bare JSON matching the schema
+			generation_config["responseMimeType"] = "application/json"
+			generation_config["responseSchema"] = response_schema
 		payload = {
 			"contents": [{"parts": [{"text": prompt}]}],
-			"generationConfig": {"temperature": temperature, "maxOutputTokens": max_output_tokens, "candidateCount": 1}
+			"generationConfig": generation_config
 		}
 		r = _SESSION.post(endpoint, json=payload, timeout=20)
 		r.raise_for_status()
@@ -78,7 +93,10 @@ def call_gemini(prompt: str, model: str = MODEL_NAME, temperature: float = TEMPE
 		import google.generativeai as genai
 		genai.configure(api_key=API_KEY)
 		model_obj = genai.GenerativeModel(model)
-		resp = model_obj.generate_content(prompt, generation_config={"temperature": temperature, "max_output_tokens": max_output_tokens, "candidate_count": 1})
+		sdk_config = {"temperature": temperature, "max_output_tokens": max_output_tokens, "candidate_count": 1}
+		if response_schema:
+			sdk_config["response_mime_type"] = "application/json"
+		resp = model_obj.generate_content(prompt, generation_config=sdk_config)
 		text = getattr(resp, "text", None) or (resp.candidates[0].content.parts[0].text if getattr(resp, "candidates", None) else "")
 		return {"text": text}
 	except Exception as e:
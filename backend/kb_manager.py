@@ -1,13 +1,15 @@
 import os
 import uuid
 import re
+import threading
 from typing import List, Dict
 
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.metrics.pairwise import cosine_similarity
 from joblib import dump, load
+from sqlalchemy import update
 
-from models import db_session, Document, Chunk
+from models import db_session, Document, Chunk, KBState, KBUpdate
 
 try:
 	from PyPDF2 import PdfReader
@@ -24,6 +26,9 @@ class KBManager:
 		self.corpus_chunks: List[str] = []
 		self.chunk_ids: List[str] = []
 		self._loaded_from_db = False
+		# Highest KB version applied; other workers' uploads show up as newer versions
+		self._kb_version = 0
+		self._sync_lock = threading.Lock()
 
 	def _extract_text(self, path: str) -> str:
 		if path.lower().endswith(".pdf") and PdfReader is not None:
@@ -58,11 +63,10 @@ class KBManager:
 			cid = f"{doc_id}_c{idx}"
 			chunk = Chunk(id=cid, document_id=doc_id, text=ch, start=idx * (self.chunk_size - self.chunk_overlap), end=idx * (self.chunk_size - self.chunk_overlap) + len(ch))
 			db_session.add(chunk)
-			self.corpus_chunks.append(ch)
-			self.chunk_ids.append(cid)
+		# Chunks and the version bump commit together, so other workers never see a half-ingested document
+		db_session.add(KBUpdate(version=self._bump_version(), document_id=doc_id))
 		db_session.commit()
-		self._reindex()
-		self._loaded_from_db = True
+		self._sync()
 		return doc_id
 
 	def _reindex(self) -> None:
@@ -70,30 +74,64 @@ class KBManager:
 			self.vectorizer = None
 			self.tfidf = None
 			return
-		self.vectorizer = TfidfVectorizer(stop_words="english")
-		self.tfidf = self.vectorizer.fit_transform(self.corpus_chunks)
+		vectorizer = TfidfVectorizer(stop_words="english")
+		tfidf = vectorizer.fit_transform(self.corpus_chunks)
+		self.vectorizer, self.tfidf = vectorizer, tfidf
 
 	def get_document_text(self, document_id: str) -> str:
 		doc = db_session.get(Document, document_id)
 		return doc.text if doc else ""
 
-	def _lazy_load(self) -> None:
-		if self._loaded_from_db:
+	def _current_version(self) -> int:
+		return db_session.query(KBState.version).filter(KBState.id == 1).scalar() or 0
+
+	def _bump_version(self) -> int:
+		# The row lock taken here is held until commit, so concurrent ingests
+		# commit in version order and a reader never skips a lower version
+		res = db_session.execute(update(KBState).where(KBState.id == 1).values(version=KBState.version + 1))
+		if res.rowcount == 0:
+			db_session.add(KBState(id=1, version=1))
+			db_session.flush()
+			return 1
+		return self._current_version()
+
+	def _sync(self) -> None:
+		# Cheap check: one primary-key lookup per call; only new chunks are fetched on change
+		version = self._current_version()
+		if self._loaded_from_db and version == self._kb_version:
 			return
-		chunks = db_session.query(Chunk).all()
-		self.corpus_chunks = [c.text for c in chunks]
-		self.chunk_ids = [c.id for c in chunks]
-		self._reindex()
-		self._loaded_from_db = True
+		with self._sync_lock:
+			if not self._loaded_from_db:
+				chunks = db_session.query(Chunk).all()
+				corpus_chunks = [c.text for c in chunks]
+				chunk_ids = [c.id for c in chunks]
+			else:
+				if version <= self._kb_version:
+					return
+				updates = db_session.query(KBUpdate.document_id).filter(KBUpdate.version > self._kb_version, KBUpdate.version <= version).all()
+				doc_ids = [u.document_id for u in updates]
+				known = set(self.chunk_ids)
+				chunks = db_session.query(Chunk).filter(Chunk.document_id.in_(doc_ids)).all()
+				new_chunks = [c for c in chunks if c.id not in known]
+				corpus_chunks = self.corpus_chunks + [c.text for c in new_chunks]
+				chunk_ids = self.chunk_ids + [c.id for c in new_chunks]
+			self.corpus_chunks = corpus_chunks
+			self.chunk_ids = chunk_ids
+			self._reindex()
+			self._kb_version = version
+			self._loaded_from_db = True
 
 	def retrieve(self, query: str, top_k: int = 3) -> List[Dict]:
-		self._lazy_load()
-		if not self.corpus_chunks or not self.vectorizer or self.tfidf is None:
+		self._sync()
+		# Snapshot so a concurrent sync cannot swap the index mid-query
+		vectorizer, tfidf = self.vectorizer, self.tfidf
+		corpus_chunks, chunk_ids = self.corpus_chunks, self.chunk_ids
+		if not corpus_chunks or not vectorizer or tfidf is None:
 			return []
-		q_vec = self.vectorizer.transform([query])
-		sims = cosine_similarity(q_vec, self.tfidf)[0]
+		q_vec = vectorizer.transform([query])
+		sims = cosine_similarity(q_vec, tfidf)[0]
 		idxs = sims.argsort()[::-1][:top_k]
 		results = []
 		for i in idxs:
-			results.append({"id": self.chunk_ids[i], "text": self.corpus_chunks[i], "score": float(sims[i])})
+			results.append({"id": chunk_ids[i], "text": corpus_chunks[i], "score": float(sims[i])})
 		return results
@@ -1,6 +1,7 @@
 import os
 from datetime import datetime
 from sqlalchemy import create_engine, Column, Integer, String, Text, DateTime, ForeignKey
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import scoped_session, sessionmaker, declarative_base, relationship
 
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///askme_pro.db")
@@ -12,6 +13,14 @@ Base.query = db_session.query_property()
 
 def init_db():
 	Base.metadata.create_all(bind=engine)
+	# Seed the KB version row; workers starting together may race on the insert
+	if db_session.get(KBState, 1) is None:
+		try:
+			db_session.add(KBState(id=1, version=0))
+			db_session.commit()
+		except IntegrityError:
+			db_session.rollback()
+	db_session.remove()
 
 
 class Session(Base):
@@ -50,3 +59,19 @@ class Chunk(Base):
 	end = Column(Integer)
 	created_at = Column(DateTime, default=datetime.utcnow)
 	document = relationship("Document", back_populates="chunks")
+
+
+class KBState(Base):
+	# Single-row KB version counter; bumping it row-locks, so versions follow commit order
+	__tablename__ = "kb_state"
+	id = Column(Integer, primary_key=True)
+	version = Column(Integer, nullable=False, default=0)
+
+
+class KBUpdate(Base):
+	# Append-only log of KB changes, tagged with the KB version they produced
+	__tablename__ = "kb_updates"
+	id = Column(Integer, primary_key=True, autoincrement=True)
+	version = Column(Integer, index=True)
+	document_id = Column(String, ForeignKey("documents.id"))
+	created_at = Column(DateTime, default=datetime.utcnow)
@@ -0,0 +1,219 @@
+import json
+from typing import Any, Dict, Iterable, List, Optional
+
+# Gemini structured-output schemas (OpenAPI subset). propertyOrdering keeps
+# "answer" first so it can be read before "sources" has finished generating.
+CHAT_SCHEMA: Dict[str, Any] = {
+	"type": "OBJECT",
+	"properties": {
+		"answer": {"type": "STRING"},
+		"sources": {
+			"type": "ARRAY",
+			"items": {
+				"type": "OBJECT",
+				"properties": {
+					"title": {"type": "STRING"},
+					"url": {"type": "STRING"},
+					"snippet": {"type": "STRING"},
+				},
+			},
+		},
+		"action": {"type": "STRING"},
+		"notes": {"type": "STRING"},
+	},
+	"required": ["answer"],
+	"propertyOrdering": ["answer", "sources", "action", "notes"],
+}
+
+SUMMARY_SCHEMA: Dict[str, Any] = {
+	"type": "OBJECT",
+	"properties": {
+		"key_points": {"type": "ARRAY", "items": {"type": "STRING"}},
+	},
+	"required": ["key_points"],
+}
+
+
+class IncrementalJSONParser:
+	"""Parses a JSON object as it arrives, tolerating truncation.
+
+	Text is scanned once as it is fed in. The parser remembers the last point
+	where the prefix can be closed into valid JSON, so `value()` returns every
+	complete top-level field and the complete items of a top-level array that
+	is still being written. Only fields named in `partial_keys` (e.g. the
+	streamed "answer") are returned while their string is unfinished; any
+	other incomplete field or array item is dropped.
+	"""
+
+	def __init__(self, partial_keys: Iterable[str] = ()):
+		self.partial_keys = frozenset(partial_keys)
+		self._buf: List[str] = []
+		self._prelude = ""
+		self._started = False
+		self.plain = False
+		self.complete = False
+		# one frame per open container: [kind, expecting]
+		self._frames: List[List[str]] = []
+		self._in_str = False
+		self._str_is_key = False
+		self._key_start = 0
+		self._key = None
+		self._esc = False
+		self._uni = 0
+		self._scalar = False
+		self._cut = 0
+		self._closers = ""
+
+	def feed(self, chunk: str) -> Optional[Any]:
+		if not chunk or self.plain or self.complete:
+			return self.value()
+		if not self._started:
+			chunk = self._skip_prelude(chunk)
+			if not self._started:
+				return None
+		for ch in chunk:
+			self._buf.append(ch)
+			self._step(ch)
+			if self.complete:
+				break
+		return self.value()
+
+	def value(self) -> Optional[Any]:
+		if not self._started or self.plain:
+			return None
+		text = "".join(self._buf)
+		try:
+			if self.complete:
+				return json.loads(text)
+			return json.loads(text[:self._cut] + self._closers)
+		except ValueError:
+			return None
+
+	def _skip_prelude(self, chunk: str) -> str:
+		# Drop leading whitespace and a ```json fence line before the payload
+		self._prelude += chunk
+		stripped = self._prelude.lstrip()
+		if stripped.startswith("```"):
+			if "\n" not in stripped:
+				return ""
+			stripped = stripped.split("\n", 1)[1].lstrip()
+		elif len(stripped) < 3 and "```".startswith(stripped):
+			return ""
+		if not stripped:
+			return ""
+		if stripped[0] not in "{[":
+			self.plain = True
+			return ""
+		self._started = True
+		self._prelude = ""
+		return stripped
+
+	def _can_cut(self) -> bool:
+		# Cut only at the root or directly inside an array that is a root field
+		depth = len(self._frames)
+		return depth == 1 or (depth == 2 and self._frames[1][0] == "[")
+
+	def _partial_ok(self) -> bool:
+		return len(self._frames) == 1 and not self._str_is_key and self._key in self.partial_keys
+
+	def _mark_cut(self, in_str: bool = False) -> None:
+		closers = "".join("}" if kind == "{" else "]" for kind, _ in reversed(self._frames))
+		self._cut = len(self._buf)
+		self._closers = ('"' if in_str else "") + closers
+
+	def _value_done(self) -> None:
+		if not self._frames:
+			self.complete = True
+			return
+		self._frames[-1][1] = "next"
+		if self._can_cut():
+			self._mark_cut()
+
+	def _step(self, ch: str) -> None:
+		if self._in_str:
+			if self._uni:
+				self._uni -= 1
+			elif self._esc:
+				self._esc = False
+				if ch == "u":
+					self._uni = 4
+			elif ch == "\\":
+				self._esc = True
+			elif ch == '"':
+				self._in_str = False
+				if self._str_is_key:
+					self._frames[-1][1] = "colon"
+					if len(self._frames) == 1:
+						self._key = json.loads("".join(self._buf[self._key_start:]))
+				else:
+					self._value_done()
+				return
+			if not self._esc and not self._uni and self._partial_ok():
+				self._mark_cut(in_str=True)
+			return
+		if self._scalar:
+			if ch not in ",}] \t\r\n":
+				return
+			self._scalar = False
+			self._buf.pop()
+			self._value_done()
+			self._buf.append(ch)
+		if ch in " \t\r\n":
+			return
+		frame = self._frames[-1] if self._frames else None
+		if ch in "{[":
+			if frame:
+				frame[1] = "next"
+			self._frames.append([ch, "key" if ch == "{" else "value"])
+			if self._can_cut():
+				self._mark_cut()
+		elif ch in "}]":
+			if self._frames:
+				self._frames.pop()
+			self._value_done()
+		elif ch == ",":
+			if frame:
+				frame[1] = "key" if frame[0] == "{" else "value"
+		elif ch == ":":
+			if frame:
+				frame[1] = "value"
+		elif ch == '"':
+			self._in_str = True
+			self._str_is_key = bool(frame) and frame[0] == "{" and frame[1] == "key"
+			if self._str_is_key:
+				self._key_start = len(self._buf) - 1
+			elif self._partial_ok():
+				self._mark_cut(in_str=True)
+		else:
+			self._scalar = True
+
+
+def strip_code_fence(text: str) -> str:
+	if not text:
+		return ""
+	clean = text.strip()
+	if clean.startswith("```"):
+		clean = clean.strip("`\n ")
+		if "\n" in clean:
+			clean = clean.split("\n", 1)[1]
+	return clean
+
+
+def parse_model_json(text: str, fallback_key: str, defaults: Dict[str, Any] = None, partial_keys: Iterable[str] = ()) -> Dict[str, Any]:
+	"""Parse a model reply into a dict, recovering truncated JSON.
+
+	Falls back to `{fallback_key: text}` only when the reply is not JSON at all;
+	a reply cut off before any field completes yields just the defaults.
+	"""
+	result = dict(defaults or {})
+	try:
+		parsed = json.loads(strip_code_fence(text))
+	except ValueError:
+		parser = IncrementalJSONParser(partial_keys)
+		parser.feed(text or "")
+		parsed = parser.value()
+	if isinstance(parsed, dict):
+		result.update(parsed)
+	else:
+		result[fallback_key] = text or ""
+	return result
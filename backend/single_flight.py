@@ -0,0 +1,56 @@
+import os
+import logging
+import threading
+from typing import Any, Callable, Dict, Hashable
+
+logger = logging.getLogger(__name__)
+
+SINGLE_FLIGHT_TIMEOUT = float(os.getenv("SINGLE_FLIGHT_TIMEOUT", "45"))
+
+
+class _Call:
+	def __init__(self):
+		self.done = threading.Event()
+		self.result: Any = None
+		self.error: BaseException = None
+
+
+class SingleFlight:
+	"""Coalesces concurrent calls sharing a key into one in-flight execution.
+
+	The first caller for a key runs the function; callers arriving while it is
+	still running wait for it and receive the same result (or exception).
+	A waiter that gives up after `timeout_seconds` runs the call itself, so a
+	slow leader only costs latency, never an error. Nothing is kept once the
+	call finishes, so this is not a cache.
+	"""
+
+	def __init__(self, timeout_seconds: float = None):
+		self.timeout = SINGLE_FLIGHT_TIMEOUT if timeout_seconds is None else timeout_seconds
+		self._lock = threading.Lock()
+		self._calls: Dict[Hashable, _Call] = {}
+
+	def do(self, key: Hashable, fn: Callable, *args, **kwargs) -> Any:
+		with self._lock:
+			call = self._calls.get(key)
+			leader = call is None
+			if leader:
+				call = _Call()
+				self._calls[key] = call
+		if not leader:
+			if not call.done.wait(self.timeout):
+				logger.warning("in-flight call still running after %ss, running it directly", self.timeout)
+				return fn(*args, **kwargs)
+			if call.error is not None:
+				raise call.error
+			return call.result
+		try:
+			call.result = fn(*args, **kwargs)
+			return call.result
+		except BaseException as e:
+			call.error = e
+			raise
+		finally:
+			with self._lock:
+				self._calls.pop(key, None)
+			call.done.set()
@@ -1,24 +1,16 @@
 import os
 import uuid
-import json
+import hashlib
 from typing import Dict, List
 
 from gemini_client import call_gemini
+from response_parser import SUMMARY_SCHEMA, parse_model_json
+from single_flight import SingleFlight
 
 
 class Summarizer:
 	def __init__(self):
-		pass
-
-	def _strip_code_fence(self, text: str) -> str:
-		if not text:
-			return ""
-		clean = text.strip()
-		if clean.startswith("```"):
-			clean = clean.strip("`\n ")
-			if "\n" in clean:
-				clean = clean.split("\n", 1)[1]
-		return clean
+		self._flight = SingleFlight()
 
 	def _render_html_bullets(self, key_points: List[str]) -> str:
 		items = ''.join(f'<li>{p}</li>' for p in key_points[:3])
@@ -49,19 +41,21 @@ class Summarizer:
 			"Return JSON: { \"key_points\": [\"point 1\", \"point 2\", \"point 3\"] }\n"
 			f"Article:\n{text}"
 		)
-		resp = call_gemini(prompt)
-		payload = self._strip_code_fence(resp.get("text", ""))
-		try:
-			parsed = json.loads(payload)
-		except Exception:
-			parsed = {"key_points": [] , "summary": payload}
+		resp = call_gemini(prompt, response_schema=SUMMARY_SCHEMA)
+		parsed = parse_model_json(resp.get("text", ""), fallback_key="summary")
 		return self._coerce_points(parsed, text, 3)
 
 	def summarize(self, text: str, sentences: int = 3) -> Dict:
+		# Concurrent requests for the same text (e.g. a shared document) wait on one run
+		key = (hashlib.sha256(text.encode("utf-8")).hexdigest(), sentences)
+		result = dict(self._flight.do(key, self._summarize, text, sentences))
+		result["key_points"] = list(result.get("key_points", []))
+		result["summary_id"] = uuid.uuid4().hex
+		return result
+
+	def _summarize(self, text: str, sentences: int) -> Dict:
 		if len(text) < 4000:
-			result = self._summarize_text(text)
-			result["summary_id"] = uuid.uuid4().hex
-			return result
+			return self._summarize_text(text)
 		chunk_size = 3000
 		chunks = [text[i:i + chunk_size] for i in range(0, len(text), chunk_size)]
 		partials: List[Dict] = [self._summarize_text(ch) for ch in chunks]
@@ -71,5 +65,4 @@ class Summarizer:
 			combined.extend(p.get("key_points", []))
 		result = {"key_points": combined[:3]}
 		result["html"] = self._render_html_bullets(result["key_points"]) 
-		result["summary_id"] = uuid.uuid4().hex
 		return result
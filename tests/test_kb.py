@@ -1,6 +1,8 @@
 import os
 import tempfile
-from backend.kb_manager import KBManager
+import uuid
+from sqlalchemy import func
+from backend.kb_manager import KBManager, db_session, Document, Chunk, KBUpdate
 
 
 def test_chunk_and_retrieve():
@@ -15,3 +17,42 @@ def test_chunk_and_retrieve():
 		assert any('Flask' in r['text'] for r in res)
 	finally:
 		os.remove(path)
+
+
+def test_upload_visible_to_other_worker():
+	# Two managers stand in for two gunicorn workers sharing one database
+	worker_a = KBManager(chunk_size=50, chunk_overlap=10)
+	worker_b = KBManager(chunk_size=50, chunk_overlap=10)
+	worker_b.retrieve('warm up', top_k=1)
+	with tempfile.NamedTemporaryFile('w', delete=False, suffix='.txt') as f:
+		f.write("Zebrafish regenerate their hearts after injury.")
+		path = f.name
+	try:
+		doc_id = worker_a.ingest_document(path)
+		res = worker_b.retrieve('zebrafish hearts', top_k=1)
+		assert res and res[0]['id'].startswith(doc_id)
+	finally:
+		os.remove(path)
+
+
+def test_late_commit_with_lower_log_id_is_still_synced():
+	# Simulates a server DB handing out log ids at INSERT time: an upload that
+	# took an earlier id commits after a later one has already been synced
+	worker_a = KBManager(chunk_size=50, chunk_overlap=10)
+	worker_b = KBManager(chunk_size=50, chunk_overlap=10)
+	with tempfile.NamedTemporaryFile('w', delete=False, suffix='.txt') as f:
+		f.write("Axolotls regrow their limbs.")
+		path = f.name
+	try:
+		worker_a.ingest_document(path)
+	finally:
+		os.remove(path)
+	assert worker_b.retrieve('axolotls limbs', top_k=1)
+	early_id = (db_session.query(func.min(KBUpdate.id)).scalar() or 1) - 1
+	doc_id = uuid.uuid4().hex
+	db_session.add(Document(id=doc_id, title="late.txt", path="late.txt", text="Tardigrades survive in space."))
+	db_session.add(Chunk(id=f"{doc_id}_c0", document_id=doc_id, text="Tardigrades survive in space.", start=0, end=29))
+	db_session.add(KBUpdate(id=early_id, version=worker_a._bump_version(), document_id=doc_id))
+	db_session.commit()
+	res = worker_b.retrieve('tardigrades space', top_k=1)
+	assert res and res[0]['id'] == f"{doc_id}_c0"
@@ -0,0 +1,57 @@
+import json
+
+from backend.response_parser import IncrementalJSONParser, parse_model_json
+
+
+CHAT_DEFAULTS = {"answer": "", "sources": [], "action": "", "notes": ""}
+
+
+def test_parses_fenced_and_plain_replies():
+	fenced = '```json\n{"answer": "Cats sleep a lot.", "sources": []}\n```'
+	assert parse_model_json(fenced, "answer", CHAT_DEFAULTS)["answer"] == "Cats sleep a lot."
+	plain = parse_model_json("Cats are mammals.", "answer", CHAT_DEFAULTS)
+	assert plain == {"answer": "Cats are mammals.", "sources": [], "action": "", "notes": ""}
+
+
+def test_recovers_truncated_reply():
+	reply = json.dumps({
+		"answer": "Flask is a micro \"web\" framework.",
+		"sources": [
+			{"title": "Python", "url": "https://python.org", "snippet": "language"},
+			{"title": "Flask", "url": "https://flask.palletsprojects.com", "snippet": "micro"},
+		],
+		"notes": "",
+	})
+	cut = reply[:reply.index("palletsprojects")]
+	parsed = parse_model_json(cut, "answer", CHAT_DEFAULTS, partial_keys=("answer",))
+	assert parsed["answer"] == 'Flask is a micro "web" framework.'
+	# only complete array items survive; the half-written source is dropped
+	assert parsed["sources"] == [{"title": "Python", "url": "https://python.org", "snippet": "language"}]
+	partial = parse_model_json('{"answer": "Flask is a mic', "answer", CHAT_DEFAULTS, partial_keys=("answer",))
+	assert partial["answer"] == "Flask is a mic"
+	points = parse_model_json('{"key_points": ["one", "two", "thr', "summary")
+	assert points["key_points"] == ["one", "two"]
+
+
+def test_truncated_fields_outside_partial_keys_are_dropped():
+	cut = '{"answer": "Steps", "action": "generate_diagram", "notes": "A -> B; B -> C; C -'
+	parsed = parse_model_json(cut, "answer", CHAT_DEFAULTS, partial_keys=("answer",))
+	assert parsed["action"] == "generate_diagram"
+	assert parsed["notes"] == ""
+	parsed = parse_model_json('{"answer": "Steps", "action": "generate_diag', "answer", CHAT_DEFAULTS, partial_keys=("answer",))
+	assert parsed["action"] == ""
+
+
+def test_reply_cut_before_answer_text_yields_defaults():
+	for cut in ('{"answer": "', '{"ans', '```json\n{'):
+		assert parse_model_json(cut, "answer", CHAT_DEFAULTS, partial_keys=("answer",)) == CHAT_DEFAULTS
+
+
+def test_answer_available_before_sources_finish():
+	reply = '{"answer": "Python is a language.", "sources": [{"title": "Python", "url": "https://python.org"}], "action": ""}'
+	parser = IncrementalJSONParser(partial_keys=("answer",))
+	seen = [parser.feed(reply[i:i + 7]) for i in range(0, len(reply), 7)]
+	first_with_answer = next(v for v in seen if v and v.get("answer") == "Python is a language.")
+	assert first_with_answer.get("sources", []) == []
+	assert parser.complete
+	assert parser.value() == json.loads(reply)
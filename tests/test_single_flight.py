@@ -0,0 +1,63 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from backend.single_flight import SingleFlight
+
+
+def test_concurrent_calls_share_one_execution():
+	flight = SingleFlight(timeout_seconds=5)
+	calls = []
+
+	def slow():
+		calls.append(1)
+		time.sleep(0.2)
+		return {"text": "ok"}
+
+	with ThreadPoolExecutor(max_workers=5) as pool:
+		futures = [pool.submit(flight.do, "k", slow) for _ in range(5)]
+		results = [f.result() for f in futures]
+	assert len(calls) == 1
+	assert results == [{"text": "ok"}] * 5
+	# nothing is cached once the call completes
+	flight.do("k", slow)
+	assert len(calls) == 2
+
+
+def test_errors_reach_leader_and_waiters():
+	flight = SingleFlight(timeout_seconds=5)
+	started = threading.Event()
+
+	def boom():
+		started.set()
+		time.sleep(0.2)
+		raise ValueError("gemini down")
+
+	with ThreadPoolExecutor(max_workers=1) as pool:
+		leader = pool.submit(flight.do, "k", boom)
+		started.wait()
+		with pytest.raises(ValueError):
+			flight.do("k", boom)
+		with pytest.raises(ValueError):
+			leader.result()
+
+
+def test_waiter_runs_call_itself_after_timeout():
+	flight = SingleFlight(timeout_seconds=0.05)
+	started = threading.Event()
+	calls = []
+
+	def slow():
+		calls.append(1)
+		started.set()
+		time.sleep(0.3)
+		return "done"
+
+	with ThreadPoolExecutor(max_workers=1) as pool:
+		leader = pool.submit(flight.do, "k", slow)
+		started.wait()
+		assert flight.do("k", slow) == "done"
+		assert leader.result() == "done"
+	assert len(calls) == 2